@@ -3,104 +3,327 @@ Workset Ownership Smart Contract
 Manages ownership and borrowing rules for Revit worksets
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, cast
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 import hashlib
+import heapq
 import json
+import sys
+
+# Reference point for converting microsecond epoch timestamps without
+# going through float division
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(slots=True)
+class WorksetMetadata:
+    """Metadata tracked per registered workset"""
+    name: str
+    document_guid: Optional[str]
+    registered_at: str
+    is_editable: bool
+    last_modified: str
+
+
+@dataclass(slots=True)
+class BorrowRequest:
+    """A borrow request through its pending/approved/denied lifecycle"""
+    request_id: str
+    workset_id: str
+    element_ids: set
+    borrower: str
+    owner: str
+    reason: str
+    requested_at: str
+    requested_at_epoch: float
+    status: str = "pending"
+    approved_at: Optional[str] = None
+    approved_at_epoch: Optional[float] = None
+    expires_at: Optional[str] = None
+    expires_epoch: Optional[float] = None
+    denied_at: Optional[str] = None
+    denial_reason: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ActiveBorrow:
+    """An approved borrow currently held against a workset"""
+    borrower: str
+    element_ids: set
+    borrowed_at: str
+    borrowed_at_epoch: float
+    expires_at: str
+    expires_epoch: float
+    request_id: str
+
+
+class OwnershipLog:
+    """Append-only columnar log of ownership events
+
+    History is written on every mutation but read rarely, so events are
+    stored as parallel per-field lists (one scalar append per column)
+    instead of one dict per event. as_dicts() rebuilds the dict records
+    for the rare serialization path.
+    """
+
+    __slots__ = ("workset_ids", "actions", "owners", "timestamps",
+                 "from_users", "timestamps_us", "document_guids", "metadata")
+
+    def __init__(self) -> None:
+        self.workset_ids: List[str] = []
+        self.actions: List[str] = []
+        self.owners: List[str] = []  # new/current owner
+        self.timestamps: List[str] = []
+        # Transfer-only / register-only columns hold None elsewhere
+        self.from_users: List[Optional[str]] = []
+        self.timestamps_us: List[Optional[int]] = []
+        self.document_guids: List[Optional[str]] = []
+        self.metadata: List[Optional[WorksetMetadata]] = []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def append(self, workset_id: str, action: str, owner: str,
+               timestamp: str, from_user: Optional[str] = None,
+               timestamp_us: Optional[int] = None,
+               document_guid: Optional[str] = None,
+               metadata: Optional[WorksetMetadata] = None) -> None:
+        self.workset_ids.append(workset_id)
+        self.actions.append(action)
+        self.owners.append(owner)
+        self.timestamps.append(timestamp)
+        self.from_users.append(from_user)
+        self.timestamps_us.append(timestamp_us)
+        self.document_guids.append(document_guid)
+        self.metadata.append(metadata)
+
+    def as_dicts(self) -> List[dict]:
+        """Rebuild per-event dict records for serialization"""
+        records: List[dict] = []
+        for i in range(len(self.actions)):
+            if self.actions[i] == "ownership_transfer":
+                records.append({
+                    "workset_id": self.workset_ids[i],
+                    "action": self.actions[i],
+                    "from_user": self.from_users[i],
+                    "to_user": self.owners[i],
+                    "timestamp": self.timestamps[i],
+                    "timestamp_us": self.timestamps_us[i],
+                    "document_guid": self.document_guids[i]
+                })
+            else:
+                metadata = self.metadata[i]
+                records.append({
+                    "workset_id": self.workset_ids[i],
+                    "action": self.actions[i],
+                    "owner": self.owners[i],
+                    "timestamp": self.timestamps[i],
+                    "metadata": asdict(metadata) if metadata else None
+                })
+        return records
 
 
 class WorksetOwnershipContract:
     """Smart contract for managing workset ownership in Revit projects"""
     
-    def __init__(self):
+    def __init__(self) -> None:
         # State variables
         self.workset_owners: Dict[str, str] = {}  # workset_id -> owner_id
-        self.workset_metadata: Dict[str, dict] = {}  # workset_id -> metadata
-        self.borrow_requests: List[dict] = []
-        self.borrow_history: List[dict] = []
-        self.ownership_history: List[dict] = []
-        self.active_borrows: Dict[str, List[dict]] = {}  # workset_id -> list of borrows
+        self.workset_metadata: Dict[str, WorksetMetadata] = {}
+        self.pending_requests: Dict[str, BorrowRequest] = {}  # request_id -> open request
+        self.borrow_history: List[BorrowRequest] = []
+        self.ownership_history: OwnershipLog = OwnershipLog()
+        self.active_borrows: Dict[str, List[ActiveBorrow]] = {}  # workset_id -> list of borrows
+        self.borrows_per_user: Dict[str, int] = defaultdict(int)  # user_id -> active borrow count
+        # Same borrow records as active_borrows, indexed for release lookups
+        self.borrows_by_user_workset: Dict[Tuple[str, str], List[ActiveBorrow]] = {}
+
+        # Per-workset aggregates kept in step with active_borrows so
+        # status queries never have to re-scan the borrow lists
+        self.borrower_counts: Dict[str, Counter] = defaultdict(Counter)  # workset_id -> borrower -> borrows
+        self.element_totals: Dict[str, int] = defaultdict(int)  # workset_id -> borrowed element count
+
+        # Min-heap of (expires_epoch, workset_id, request_id); entries for
+        # borrows released before expiry are skipped lazily during the sweep
+        self._expiry_heap: List[Tuple[float, str, str]] = []
         
         # Contract settings
-        self.borrow_timeout_hours = 24
-        self.max_concurrent_borrows = 10
+        self.borrow_timeout_hours: int = 24
+        self.max_concurrent_borrows: int = 10
+
+        # Bumped on every mutation; keys the memoized status lookups so
+        # repeated polls between writes hit the cache
+        self._version: int = 0
         
     def register_workset(self, workset_id: str, workset_name: str, 
                         owner: str, document_guid: str, **kwargs) -> dict:
         """Register a new workset or update existing one"""
         
-        # Validate inputs
-        if not all([workset_id, workset_name, owner]):
+        # Validate inputs (short-circuits, no list allocation)
+        if not (workset_id and workset_name and owner):
             return {"success": False, "error": "Missing required parameters"}
+
+        # Ids recur across dicts and history entries; interning dedups the
+        # strings and lets dict lookups hit the identity fast path
+        workset_id = sys.intern(workset_id)
+        owner = sys.intern(owner)
         
         # Check if workset exists
         is_new = workset_id not in self.workset_owners
-        
+
+        # Single timestamp for everything recorded by this call
+        now_iso = datetime.utcnow().isoformat()
+
         # Update ownership
         self.workset_owners[workset_id] = owner
-        
+
         # Update metadata
-        self.workset_metadata[workset_id] = {
-            "name": workset_name,
-            "document_guid": document_guid,
-            "registered_at": datetime.utcnow().isoformat(),
-            "is_editable": kwargs.get("is_editable", True),
-            "last_modified": datetime.utcnow().isoformat()
-        }
-        
+        self.workset_metadata[workset_id] = WorksetMetadata(
+            name=workset_name,
+            document_guid=document_guid,
+            registered_at=now_iso,
+            is_editable=kwargs.get("is_editable", True),
+            last_modified=now_iso
+        )
+
         # Log to history
-        self.ownership_history.append({
-            "workset_id": workset_id,
-            "action": "registered" if is_new else "updated",
-            "owner": owner,
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": self.workset_metadata[workset_id]
-        })
-        
+        self.ownership_history.append(
+            workset_id,
+            "registered" if is_new else "updated",
+            owner,
+            now_iso,
+            metadata=self.workset_metadata[workset_id]
+        )
+        self._version += 1
+
         return {
             "success": True,
             "workset_id": workset_id,
             "action": "registered" if is_new else "updated"
         }
     
-    def transfer_ownership(self, workset_id: str, from_user: str, 
+    def bulk_register(self, entries: List[dict]) -> dict:
+        """Register many worksets in one call
+
+        A cold project load registers thousands of worksets back to
+        back, forcing workset_owners and workset_metadata through
+        repeated resize/rehash cycles. This pre-sizes both dicts for the
+        combined key set in one allocation, then populates them; entries
+        take the same shape as register_workset's parameters.
+        """
+
+        entries = list(entries)
+
+        # Validate up front so only ids that will really be written get
+        # pre-sized slots
+        valid = []
+        errors = []
+        for entry in entries:
+            workset_id = entry.get("workset_id")
+            workset_name = entry.get("workset_name")
+            owner = entry.get("owner")
+            if not (workset_id and workset_name and owner):
+                errors.append({
+                    "workset_id": workset_id,
+                    "error": "Missing required parameters"
+                })
+                continue
+            valid.append((
+                sys.intern(workset_id),
+                workset_name,
+                sys.intern(owner),
+                entry.get("document_guid"),
+                entry.get("is_editable", True)
+            ))
+
+        # One allocation sized for existing plus incoming keys; the
+        # per-entry writes below then never trigger a resize. The None
+        # placeholders from fromkeys only exist for valid incoming ids,
+        # all of which are overwritten in the loop below and never read
+        # (is_new checks the pre-bulk dict), so the casts hold by the
+        # time this method returns.
+        previous = self.workset_owners
+        all_ids = list(previous)
+        all_ids.extend(v[0] for v in valid)
+        owners = cast(Dict[str, str], dict.fromkeys(all_ids))
+        owners.update(previous)
+        metadata = cast(Dict[str, WorksetMetadata], dict.fromkeys(all_ids))
+        metadata.update(self.workset_metadata)
+        self.workset_owners = owners
+        self.workset_metadata = metadata
+
+        now_iso = datetime.utcnow().isoformat()
+        registered = 0
+        updated = 0
+        seen: set = set()
+        for workset_id, workset_name, owner, document_guid, is_editable in valid:
+            # An id repeated within the batch is an update the second
+            # time, matching sequential register_workset calls
+            is_new = workset_id not in previous and workset_id not in seen
+            seen.add(workset_id)
+            if is_new:
+                registered += 1
+            else:
+                updated += 1
+
+            self.workset_owners[workset_id] = owner
+            self.workset_metadata[workset_id] = WorksetMetadata(
+                name=workset_name,
+                document_guid=document_guid,
+                registered_at=now_iso,
+                is_editable=is_editable,
+                last_modified=now_iso
+            )
+            self.ownership_history.append(
+                workset_id,
+                "registered" if is_new else "updated",
+                owner,
+                now_iso,
+                metadata=self.workset_metadata[workset_id]
+            )
+
+        self._version += 1
+
+        return {
+            "success": True,
+            "registered": registered,
+            "updated": updated,
+            "errors": errors
+        }
+
+    def transfer_ownership(self, workset_id: str, from_user: str,
                           to_user: str, timestamp: int, **kwargs) -> dict:
         """Transfer ownership of a workset between users"""
-        
-        # Validate workset exists
-        if workset_id not in self.workset_owners:
-            return {"success": False, "error": "Workset not found"}
-        
-        # Validate current owner
-        if self.workset_owners[workset_id] != from_user:
-            return {
-                "success": False, 
-                "error": f"User {from_user} is not the current owner"
-            }
-        
-        # Check for active borrows
-        if workset_id in self.active_borrows and self.active_borrows[workset_id]:
-            return {
-                "success": False,
-                "error": "Cannot transfer ownership with active borrows"
-            }
-        
+
+        workset_id = sys.intern(workset_id)
+        from_user = sys.intern(from_user)
+        to_user = sys.intern(to_user)
+
+        error = self._check_can_transfer(workset_id, from_user)
+        if error:
+            return {"success": False, "error": error}
+
         # Transfer ownership
         self.workset_owners[workset_id] = to_user
         
         # Update metadata
-        self.workset_metadata[workset_id]["last_modified"] = datetime.utcnow().isoformat()
+        self.workset_metadata[workset_id].last_modified = datetime.utcnow().isoformat()
         
         # Log transfer
-        self.ownership_history.append({
-            "workset_id": workset_id,
-            "action": "ownership_transfer",
-            "from_user": from_user,
-            "to_user": to_user,
-            "timestamp": datetime.utcfromtimestamp(timestamp / 1000000).isoformat(),
-            "document_guid": kwargs.get("document_guid")
-        })
-        
+        self.ownership_history.append(
+            workset_id,
+            "ownership_transfer",
+            to_user,
+            (_EPOCH + timedelta(microseconds=timestamp)).isoformat(),
+            from_user=from_user,
+            timestamp_us=timestamp,
+            document_guid=kwargs.get("document_guid")
+        )
+        self._version += 1
+
         return {
             "success": True,
             "workset_id": workset_id,
@@ -111,41 +334,32 @@ class WorksetOwnershipContract:
     def request_borrow(self, workset_id: str, element_ids: List[str], 
                       user_id: str, reason: str = "") -> dict:
         """Request to borrow specific elements from a workset"""
-        
-        # Validate workset
-        if workset_id not in self.workset_owners:
-            return {"success": False, "error": "Workset not found"}
-        
-        # Check if user is not the owner
-        if self.workset_owners[workset_id] == user_id:
-            return {"success": False, "error": "Owner cannot borrow from own workset"}
-        
-        # Check concurrent borrow limit
-        user_active_borrows = sum(
-            1 for borrows in self.active_borrows.values() 
-            for b in borrows if b["borrower"] == user_id
-        )
-        if user_active_borrows >= self.max_concurrent_borrows:
-            return {
-                "success": False,
-                "error": f"User has reached maximum concurrent borrows ({self.max_concurrent_borrows})"
-            }
-        
-        # Create borrow request
+
+        workset_id = sys.intern(workset_id)
+        user_id = sys.intern(user_id)
+
+        error = self._check_can_borrow(workset_id, user_id)
+        if error:
+            return {"success": False, "error": error}
+
+        # Create borrow request; epoch fields are the canonical timestamps
+        # for internal comparisons, ISO strings are for external consumers
+        now = datetime.utcnow()
         request_id = self._generate_request_id(workset_id, user_id)
-        borrow_request = {
-            "request_id": request_id,
-            "workset_id": workset_id,
-            "element_ids": element_ids,
-            "borrower": user_id,
-            "owner": self.workset_owners[workset_id],
-            "reason": reason,
-            "requested_at": datetime.utcnow().isoformat(),
-            "status": "pending"
-        }
-        
-        self.borrow_requests.append(borrow_request)
+        borrow_request = BorrowRequest(
+            request_id=request_id,
+            workset_id=workset_id,
+            element_ids=set(element_ids),
+            borrower=user_id,
+            owner=self.workset_owners[workset_id],
+            reason=reason,
+            requested_at=now.isoformat(),
+            requested_at_epoch=now.timestamp()
+        )
         
+        self.pending_requests[request_id] = borrow_request
+        self._version += 1
+
         # Auto-approve if owner has enabled it (future feature)
         # For now, return pending status
         
@@ -159,87 +373,163 @@ class WorksetOwnershipContract:
     def approve_borrow(self, request_id: str, owner_id: str) -> dict:
         """Owner approves a borrow request"""
         
-        # Find request
-        request = next((r for r in self.borrow_requests 
-                       if r["request_id"] == request_id), None)
-        
+        # Find request (only open requests live in pending_requests)
+        request = self.pending_requests.get(request_id)
+
         if not request:
             return {"success": False, "error": "Request not found"}
-        
+
         # Validate owner
-        if request["owner"] != owner_id:
+        if request.owner != owner_id:
             return {"success": False, "error": "Only workset owner can approve"}
-        
-        # Check if already processed
-        if request["status"] != "pending":
-            return {"success": False, "error": f"Request already {request['status']}"}
-        
-        # Approve request
-        request["status"] = "approved"
-        request["approved_at"] = datetime.utcnow().isoformat()
-        request["expires_at"] = (
-            datetime.utcnow() + timedelta(hours=self.borrow_timeout_hours)
-        ).isoformat()
-        
+
+        # Request is now processed; move it out of the pending set
+        del self.pending_requests[request_id]
+
+        # Approve request (single clock read for both timestamps)
+        now = datetime.utcnow()
+        expires = now + timedelta(hours=self.borrow_timeout_hours)
+        request.status = "approved"
+        request.approved_at = now.isoformat()
+        request.approved_at_epoch = now.timestamp()
+        request.expires_at = expires.isoformat()
+        request.expires_epoch = expires.timestamp()
+
         # Add to active borrows
-        if request["workset_id"] not in self.active_borrows:
-            self.active_borrows[request["workset_id"]] = []
-        
-        self.active_borrows[request["workset_id"]].append({
-            "borrower": request["borrower"],
-            "element_ids": request["element_ids"],
-            "borrowed_at": request["approved_at"],
-            "expires_at": request["expires_at"],
-            "request_id": request_id
-        })
-        
-        # Add to history
-        self.borrow_history.append(request.copy())
-        
+        if request.workset_id not in self.active_borrows:
+            self.active_borrows[request.workset_id] = []
+
+        # The active borrow takes the request's element set by reference
+        # (no copy, which matters for bulk borrows). This is safe because
+        # the release and expiry paths replace the set rather than mutate
+        # it, so the history record keeps the full set as approved.
+        borrow_entry = ActiveBorrow(
+            borrower=request.borrower,
+            element_ids=request.element_ids,
+            borrowed_at=request.approved_at,
+            borrowed_at_epoch=request.approved_at_epoch,
+            expires_at=request.expires_at,
+            expires_epoch=request.expires_epoch,
+            request_id=request_id
+        )
+        self.active_borrows[request.workset_id].append(borrow_entry)
+        self.borrows_by_user_workset.setdefault(
+            (request.workset_id, request.borrower), []
+        ).append(borrow_entry)
+        heapq.heappush(
+            self._expiry_heap,
+            (request.expires_epoch, request.workset_id, request_id)
+        )
+        self.borrows_per_user[request.borrower] += 1
+        self.borrower_counts[request.workset_id][request.borrower] += 1
+        self.element_totals[request.workset_id] += len(request.element_ids)
+
+        # Add to history (the request left pending_requests above, so the
+        # history list holds the only reference - no defensive copy needed)
+        self.borrow_history.append(request)
+        self._version += 1
+
         return {
             "success": True,
             "request_id": request_id,
-            "borrower": request["borrower"],
-            "expires_at": request["expires_at"]
+            "borrower": request.borrower,
+            "expires_at": request.expires_at
         }
-    
+
+    def deny_borrow(self, request_id: str, owner_id: str, reason: str = "") -> dict:
+        """Owner denies a borrow request"""
+
+        # Find request
+        request = self.pending_requests.get(request_id)
+
+        if not request:
+            return {"success": False, "error": "Request not found"}
+
+        # Validate owner
+        if request.owner != owner_id:
+            return {"success": False, "error": "Only workset owner can deny"}
+
+        # Request is now processed; move it out of the pending set
+        del self.pending_requests[request_id]
+
+        # Deny request
+        request.status = "denied"
+        request.denied_at = datetime.utcnow().isoformat()
+        request.denial_reason = reason
+
+        # Add to history (same ownership transfer as approve_borrow)
+        self.borrow_history.append(request)
+        self._version += 1
+
+        return {
+            "success": True,
+            "request_id": request_id,
+            "status": "denied"
+        }
+
     def release_borrowed(self, workset_id: str, element_ids: List[str], 
                         user_id: str) -> dict:
         """Release borrowed elements back to workset"""
-        
+
+        workset_id = sys.intern(workset_id)
+        user_id = sys.intern(user_id)
+
         if workset_id not in self.active_borrows:
             return {"success": False, "error": "No active borrows for workset"}
         
-        # Find user's borrows
-        user_borrows = [
-            b for b in self.active_borrows[workset_id] 
-            if b["borrower"] == user_id
-        ]
-        
+        # Find user's borrows via the (workset, borrower) index
+        user_borrows = self.borrows_by_user_workset.get((workset_id, user_id), [])
+
         if not user_borrows:
             return {"success": False, "error": "User has no active borrows"}
         
-        # Release specified elements
-        released = []
+        # Release specified elements; element_ids are stored as sets so
+        # this is plain set arithmetic
+        to_release = set(element_ids)
+        released: List[str] = []
         for borrow in user_borrows:
-            # Remove released elements
-            remaining = [e for e in borrow["element_ids"] if e not in element_ids]
-            
-            if len(remaining) < len(borrow["element_ids"]):
-                released.extend([
-                    e for e in borrow["element_ids"] if e in element_ids
-                ])
-                
-                if remaining:
-                    borrow["element_ids"] = remaining
-                else:
-                    # All elements released, remove borrow
-                    self.active_borrows[workset_id].remove(borrow)
-        
+            # Remove released elements by replacing the set - never mutate
+            # it in place, approve_borrow shares it with the history record
+            current = borrow.element_ids
+            hit = current & to_release
+
+            if hit:
+                # Sorted so the payload is deterministic under hash
+                # randomization (contract outputs must replay identically)
+                released.extend(sorted(hit))
+                borrow.element_ids = current - to_release
+
+                if not borrow.element_ids:
+                    # All elements released
+                    self.borrows_per_user[user_id] -= 1
+                    self.borrower_counts[workset_id][user_id] -= 1
+                    if not self.borrower_counts[workset_id][user_id]:
+                        del self.borrower_counts[workset_id][user_id]
+
+        # Compact fully-released borrows in a single rebuild rather than
+        # calling list.remove once per borrow; the user index shares the
+        # borrow dicts so it is compacted the same way
+        self.active_borrows[workset_id] = [
+            b for b in self.active_borrows[workset_id] if b.element_ids
+        ]
+        key = (workset_id, user_id)
+        self.borrows_by_user_workset[key] = [
+            b for b in user_borrows if b.element_ids
+        ]
+        if not self.borrows_by_user_workset[key]:
+            del self.borrows_by_user_workset[key]
+
+        # Keep the element total in step with what was just released
+        self.element_totals[workset_id] -= len(released)
+
         # Clean up empty workset entry
         if not self.active_borrows[workset_id]:
             del self.active_borrows[workset_id]
-        
+            self.borrower_counts.pop(workset_id, None)
+            self.element_totals.pop(workset_id, None)
+
+        self._version += 1
+
         return {
             "success": True,
             "released_elements": released,
@@ -250,57 +540,142 @@ class WorksetOwnershipContract:
         """Check and clean up expired borrows"""
         
         expired = []
-        current_time = datetime.utcnow()
-        
-        for workset_id, borrows in list(self.active_borrows.items()):
-            for borrow in borrows[:]:
-                expires_at = datetime.fromisoformat(borrow["expires_at"])
-                
-                if current_time > expires_at:
-                    expired.append({
-                        "workset_id": workset_id,
-                        "borrower": borrow["borrower"],
-                        "element_ids": borrow["element_ids"],
-                        "expired_at": expires_at.isoformat()
-                    })
-                    
-                    # Remove expired borrow
-                    borrows.remove(borrow)
-            
-            # Clean up empty entries
+        now_epoch = datetime.utcnow().timestamp()
+
+        # Pop only entries that are actually due; anything expiring later
+        # stays in the heap untouched, so an idle sweep is a single peek
+        due: Dict[str, set] = defaultdict(set)
+        while self._expiry_heap and self._expiry_heap[0][0] <= now_epoch:
+            _, workset_id, request_id = heapq.heappop(self._expiry_heap)
+            due[workset_id].add(request_id)
+
+        # One filter-rebuild per affected workset instead of list.remove
+        # per borrow; heap entries for already-released borrows simply
+        # match nothing here (lazy deletion)
+        for workset_id, request_ids in due.items():
+            borrows = self.active_borrows.get(workset_id)
             if not borrows:
+                continue
+
+            remaining = []
+            for borrow in borrows:
+                if borrow.request_id not in request_ids:
+                    remaining.append(borrow)
+                    continue
+
+                expired.append({
+                    "workset_id": workset_id,
+                    "borrower": borrow.borrower,
+                    # sorted for deterministic payloads under hash
+                    # randomization
+                    "element_ids": sorted(borrow.element_ids),
+                    "expired_at": borrow.expires_at
+                })
+                self.borrows_per_user[borrow.borrower] -= 1
+                self.borrower_counts[workset_id][borrow.borrower] -= 1
+                if not self.borrower_counts[workset_id][borrow.borrower]:
+                    del self.borrower_counts[workset_id][borrow.borrower]
+                self.element_totals[workset_id] -= len(borrow.element_ids)
+
+                # Drop from the user index (bounded by the concurrent
+                # borrow cap, so the remove is cheap)
+                key = (workset_id, borrow.borrower)
+                user_list = self.borrows_by_user_workset.get(key)
+                if user_list is not None:
+                    user_list.remove(borrow)
+                    if not user_list:
+                        del self.borrows_by_user_workset[key]
+
+            if remaining:
+                self.active_borrows[workset_id] = remaining
+            else:
                 del self.active_borrows[workset_id]
-        
+                self.borrower_counts.pop(workset_id, None)
+                self.element_totals.pop(workset_id, None)
+
+        if expired:
+            self._version += 1
+
         return expired
     
     def get_workset_status(self, workset_id: str) -> dict:
         """Get current status of a workset"""
-        
-        if workset_id not in self.workset_owners:
+
+        if self.workset_owners.get(workset_id) is None:
             return {"success": False, "error": "Workset not found"}
-        
+
+        # Hand out a copy so callers can annotate the payload without
+        # poisoning the cached entry (the baseline built a fresh dict
+        # per call); the nested metadata dict and borrowers list are
+        # copied for the same reason, the remaining values are immutable
+        status = dict(self._status_for(workset_id, self._version))
+        status["metadata"] = dict(status["metadata"])
+        status["borrowers"] = list(status["borrowers"])
+        return status
+
+    @lru_cache(maxsize=1024)
+    def _status_for(self, workset_id: str, version: int) -> dict:
+        """Build the status payload for one contract version
+
+        The version key makes this functionally pure: repeated polls
+        between mutations hit the cache, and entries for old versions
+        age out of the LRU naturally. Note lru_cache on a method keeps
+        a strong reference to self in a process-wide cache; acceptable
+        here because the contract is a long-lived module singleton.
+        """
         active_borrows = self.active_borrows.get(workset_id, [])
-        
+        borrower_counts = self.borrower_counts.get(workset_id)
+
         return {
             "success": True,
             "workset_id": workset_id,
             "owner": self.workset_owners[workset_id],
-            "metadata": self.workset_metadata[workset_id],
+            "metadata": asdict(self.workset_metadata[workset_id]),
             "active_borrows": len(active_borrows),
-            "borrowed_elements": sum(len(b["element_ids"]) for b in active_borrows),
-            "borrowers": list(set(b["borrower"] for b in active_borrows))
+            "borrowed_elements": self.element_totals.get(workset_id, 0),
+            "borrowers": list(borrower_counts) if borrower_counts else []
         }
     
+    def _check_can_transfer(self, workset_id: str, from_user: str) -> Optional[str]:
+        """Validate a transfer; returns an error message or None
+
+        A single .get() covers both the existence and ownership checks
+        instead of probing workset_owners twice.
+        """
+        owner = self.workset_owners.get(workset_id)
+        if owner is None:
+            return "Workset not found"
+        if owner != from_user:
+            return f"User {from_user} is not the current owner"
+        if self.active_borrows.get(workset_id):
+            return "Cannot transfer ownership with active borrows"
+        return None
+
+    def _check_can_borrow(self, workset_id: str, user_id: str) -> Optional[str]:
+        """Validate a borrow request; returns an error message or None"""
+        owner = self.workset_owners.get(workset_id)
+        if owner is None:
+            return "Workset not found"
+        if owner == user_id:
+            return "Owner cannot borrow from own workset"
+        if self.borrows_per_user.get(user_id, 0) >= self.max_concurrent_borrows:
+            return (
+                f"User has reached maximum concurrent borrows "
+                f"({self.max_concurrent_borrows})"
+            )
+        return None
+
     def _generate_transfer_id(self, workset_id: str, timestamp: int) -> str:
         """Generate unique transfer ID"""
         data = f"{workset_id}-{timestamp}-transfer"
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
-    
+        # BLAKE2b emits the 64-bit id directly instead of truncating SHA-256
+        return hashlib.blake2b(data.encode(), digest_size=8).hexdigest()
+
     def _generate_request_id(self, workset_id: str, user_id: str) -> str:
         """Generate unique request ID"""
         timestamp = datetime.utcnow().isoformat()
         data = f"{workset_id}-{user_id}-{timestamp}"
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        return hashlib.blake2b(data.encode(), digest_size=8).hexdigest()
 
 
 # Contract instance (would be managed by blockchain in production)
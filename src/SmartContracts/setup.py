@@ -0,0 +1,28 @@
+"""
+Optional mypyc build for the smart contract module
+
+The contract is pure dict/set manipulation on small typed records,
+which compiles well with mypyc. Build the extension with:
+
+    pip install mypy setuptools
+    python setup.py build_ext --inplace
+
+Run the command from this directory so --inplace drops the extension
+next to the module. Importers pick up the compiled extension
+automatically when it exists and fall back to the interpreted module
+otherwise; no API changes either way.
+"""
+
+import os
+
+from setuptools import setup
+
+from mypyc.build import mypycify
+
+# Anchor on this file so the build works from any working directory
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+setup(
+    name="revitblockchain-contracts",
+    ext_modules=mypycify([os.path.join(_HERE, "WorksetOwnershipContract.py")]),
+)
@@ -0,0 +1,237 @@
+"""
+Tests for the workset ownership smart contract
+
+The contract keeps several derived structures (per-user counters,
+per-workset aggregates, the user-borrow index, and the expiry heap) in
+step with active_borrows across approval, release, and expiry. These
+tests pin the borrow lifecycle and check the aggregates against values
+recomputed from scratch so drift shows up immediately.
+"""
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "src", "SmartContracts")
+)
+
+from WorksetOwnershipContract import WorksetOwnershipContract
+
+
+def make_contract():
+    contract = WorksetOwnershipContract()
+    contract.register_workset("ws1", "Structure", "alice", "guid-1")
+    return contract
+
+
+def approved_borrow(contract, workset_id, element_ids, user_id):
+    request = contract.request_borrow(workset_id, element_ids, user_id)
+    assert request["success"], request
+    result = contract.approve_borrow(request["request_id"], contract.workset_owners[workset_id])
+    assert result["success"], result
+    return request["request_id"]
+
+
+def recomputed_status(contract, workset_id):
+    """Recompute status aggregates directly from active_borrows"""
+    borrows = contract.active_borrows.get(workset_id, [])
+    return {
+        "active_borrows": len(borrows),
+        "borrowed_elements": sum(len(b.element_ids) for b in borrows),
+        "borrowers": sorted({b.borrower for b in borrows}),
+    }
+
+
+def assert_aggregates_consistent(contract, workset_id):
+    expected = recomputed_status(contract, workset_id)
+    status = contract.get_workset_status(workset_id)
+    assert status["active_borrows"] == expected["active_borrows"]
+    assert status["borrowed_elements"] == expected["borrowed_elements"]
+    assert sorted(status["borrowers"]) == expected["borrowers"]
+
+    # Per-user counter matches a full recount across all worksets
+    for user, count in contract.borrows_per_user.items():
+        actual = sum(
+            1 for borrows in contract.active_borrows.values()
+            for b in borrows if b.borrower == user
+        )
+        assert count == actual, (user, count, actual)
+
+
+class TestRegistration:
+    def test_register_and_update(self):
+        contract = make_contract()
+        result = contract.register_workset("ws1", "Structure", "alice", "guid-1")
+        assert result["action"] == "updated"
+        result = contract.register_workset("ws2", "MEP", "bob", "guid-1")
+        assert result["action"] == "registered"
+
+    def test_missing_parameters_rejected(self):
+        contract = WorksetOwnershipContract()
+        result = contract.register_workset("", "Name", "alice", "guid-1")
+        assert not result["success"]
+
+    def test_bulk_register_matches_single(self):
+        contract = make_contract()
+        result = contract.bulk_register([
+            {"workset_id": "ws2", "workset_name": "MEP", "owner": "bob",
+             "document_guid": "guid-1"},
+            {"workset_id": "ws1", "workset_name": "Structure v2",
+             "owner": "alice", "document_guid": "guid-1"},
+            {"workset_id": "ws3", "workset_name": "", "owner": "bob"},
+        ])
+        assert result["registered"] == 1
+        assert result["updated"] == 1
+        assert len(result["errors"]) == 1
+        assert "ws3" not in contract.workset_owners
+        assert contract.get_workset_status("ws2")["owner"] == "bob"
+        # a failed bulk entry can still be registered normally afterwards
+        assert contract.register_workset(
+            "ws3", "Site", "bob", "guid-1")["action"] == "registered"
+
+    def test_bulk_register_duplicate_id_counts_as_update(self):
+        contract = WorksetOwnershipContract()
+        result = contract.bulk_register([
+            {"workset_id": "ws1", "workset_name": "First", "owner": "alice",
+             "document_guid": "guid-1"},
+            {"workset_id": "ws1", "workset_name": "Second", "owner": "bob",
+             "document_guid": "guid-1"},
+        ])
+        assert result["registered"] == 1
+        assert result["updated"] == 1
+        assert contract.workset_owners["ws1"] == "bob"
+        actions = [r["action"] for r in contract.ownership_history.as_dicts()]
+        assert actions == ["registered", "updated"]
+
+
+class TestBorrowLifecycle:
+    def test_partial_then_full_release(self):
+        contract = make_contract()
+        approved_borrow(contract, "ws1", ["e1", "e2", "e3"], "bob")
+        assert_aggregates_consistent(contract, "ws1")
+
+        result = contract.release_borrowed("ws1", ["e1"], "bob")
+        assert result["released_elements"] == ["e1"]
+        assert contract.get_workset_status("ws1")["borrowed_elements"] == 2
+        assert_aggregates_consistent(contract, "ws1")
+
+        result = contract.release_borrowed("ws1", ["e2", "e3"], "bob")
+        assert result["released_elements"] == ["e2", "e3"]
+        status = contract.get_workset_status("ws1")
+        assert status["active_borrows"] == 0
+        assert status["borrowers"] == []
+        # all derived structures are cleaned up with the last borrow
+        assert "ws1" not in contract.active_borrows
+        assert ("ws1", "bob") not in contract.borrows_by_user_workset
+        assert contract.borrows_per_user["bob"] == 0
+
+    def test_deny_removes_pending_request(self):
+        contract = make_contract()
+        request = contract.request_borrow("ws1", ["e1"], "bob")
+        request_id = request["request_id"]
+
+        assert not contract.deny_borrow(request_id, "mallory")["success"]
+        assert request_id in contract.pending_requests
+
+        assert contract.deny_borrow(request_id, "alice", "busy")["success"]
+        assert request_id not in contract.pending_requests
+        assert not contract.approve_borrow(request_id, "alice")["success"]
+        assert contract.borrow_history[-1].status == "denied"
+
+    def test_concurrent_borrow_limit(self):
+        contract = make_contract()
+        contract.register_workset("ws2", "MEP", "alice", "guid-1")
+        contract.max_concurrent_borrows = 2
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+        approved_borrow(contract, "ws2", ["e2"], "bob")
+        result = contract.request_borrow("ws1", ["e3"], "bob")
+        assert not result["success"]
+        # releasing frees a slot again
+        contract.release_borrowed("ws1", ["e1"], "bob")
+        assert contract.request_borrow("ws1", ["e3"], "bob")["success"]
+
+    def test_transfer_blocked_by_active_borrow(self):
+        contract = make_contract()
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+        result = contract.transfer_ownership("ws1", "alice", "carol", 1)
+        assert not result["success"]
+        contract.release_borrowed("ws1", ["e1"], "bob")
+        result = contract.transfer_ownership("ws1", "alice", "carol", 1)
+        assert result["success"]
+
+
+class TestExpirySweep:
+    def test_due_borrows_are_expired(self):
+        contract = make_contract()
+        # negative timeout makes the borrow expire on approval
+        contract.borrow_timeout_hours = -1
+        approved_borrow(contract, "ws1", ["e1", "e2"], "bob")
+
+        expired = contract.check_expired_borrows()
+        assert len(expired) == 1
+        assert expired[0]["borrower"] == "bob"
+        assert expired[0]["element_ids"] == ["e1", "e2"]
+        assert "ws1" not in contract.active_borrows
+        assert contract.borrows_per_user["bob"] == 0
+        assert ("ws1", "bob") not in contract.borrows_by_user_workset
+        assert not contract._expiry_heap
+
+    def test_stale_heap_entry_for_released_borrow_is_skipped(self):
+        contract = make_contract()
+        contract.borrow_timeout_hours = -1
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+
+        # release before the sweep runs; the heap entry goes stale
+        contract.release_borrowed("ws1", ["e1"], "bob")
+        assert contract._expiry_heap
+
+        expired = contract.check_expired_borrows()
+        assert expired == []
+        assert not contract._expiry_heap
+        assert contract.borrows_per_user["bob"] == 0
+
+    def test_unexpired_borrows_survive_the_sweep(self):
+        contract = make_contract()
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+        assert contract.check_expired_borrows() == []
+        assert contract.get_workset_status("ws1")["active_borrows"] == 1
+        assert contract._expiry_heap
+
+    def test_mixed_due_and_live_borrowers(self):
+        contract = make_contract()
+        contract.borrow_timeout_hours = -1
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+        contract.borrow_timeout_hours = 24
+        approved_borrow(contract, "ws1", ["e2", "e3"], "carol")
+
+        expired = contract.check_expired_borrows()
+        assert [e["borrower"] for e in expired] == ["bob"]
+        assert_aggregates_consistent(contract, "ws1")
+        assert contract.get_workset_status("ws1")["borrowers"] == ["carol"]
+
+
+class TestStatusAggregates:
+    def test_aggregates_match_recomputation_through_mixed_operations(self):
+        contract = make_contract()
+        approved_borrow(contract, "ws1", ["e1", "e2"], "bob")
+        approved_borrow(contract, "ws1", ["e3", "e4", "e5"], "carol")
+        assert_aggregates_consistent(contract, "ws1")
+
+        contract.release_borrowed("ws1", ["e3"], "carol")
+        assert_aggregates_consistent(contract, "ws1")
+
+        contract.release_borrowed("ws1", ["e1", "e2"], "bob")
+        assert_aggregates_consistent(contract, "ws1")
+        assert contract.get_workset_status("ws1")["borrowers"] == ["carol"]
+
+    def test_cached_status_is_isolated_from_caller_mutation(self):
+        contract = make_contract()
+        approved_borrow(contract, "ws1", ["e1"], "bob")
+        status = contract.get_workset_status("ws1")
+        status["owner"] = "mallory"
+        status["metadata"]["name"] = "mallory"
+        status["borrowers"].append("mallory")
+        fresh = contract.get_workset_status("ws1")
+        assert fresh["owner"] == "alice"
+        assert fresh["metadata"]["name"] == "Structure"
+        assert fresh["borrowers"] == ["bob"]